@@ -3,7 +3,7 @@
 Network Latency Tester Streamlit App
 
 This script is a Streamlit application designed to test the network latency
-of a specified URL by sending multiple HTTP requests using the `curl` command.
+of a specified URL by sending multiple HTTP requests through libcurl (`pycurl`).
 It collects various metrics such as DNS lookup time, TCP connect time, SSL
 handshake time, server processing time, and total time. The results are displayed
 in both tabular and graphical formats, with additional features for saving metrics
@@ -12,15 +12,22 @@ to a CSV file.
 Key Features:
 - Allows users to configure the test by specifying the URL, number of requests, 
   and delay between each request through the Streamlit sidebar.
+- Optionally keeps several requests in flight at once (libcurl multi interface)
+  to shorten the overall test.
 - Displays a progress bar and real-time status updates for each request.
 - Collects metrics for each request and converts them into milliseconds for better readability.
-- Outputs the metrics in a DataFrame format and allows the user to download it as a CSV file.
-- Visualizes the metrics using a bar chart with gridlines for easy interpretation.
+- Summarizes each metric with p50/p95/p99, mean and standard deviation.
+- Outputs the metrics as a table and allows the user to download it as a CSV file.
+- Visualizes the metrics using an interactive bar chart (st.bar_chart); a
+  matplotlib version with gridlines can be shown and downloaded as PNG.
 
 Classes:
 - NetworkLatencyTester:
-    - Handles the HTTP requests, collects metrics, converts them to a DataFrame,
+    - Handles the HTTP requests, collects metrics, converts them to a table and CSV,
       and plots a bar chart.
+- TimedHTTPConnection / TimedHTTPSConnection:
+    - http.client connections that record curl-style timings (DNS, connect,
+      TLS, first byte, total) for the in-process client.
 
 Functions:
 - main():
@@ -31,12 +38,18 @@ Usage:
 1. Enter the URL to test in the "URL to Test" field in the Streamlit sidebar.
 2. Specify the number of requests and delay between each request.
 3. Click the "Start Test" button to perform the test.
-4. View the results in a DataFrame and a colorful bar chart.
+4. View the results in a table and a colorful bar chart.
 5. Optionally download the metrics as a CSV file for further analysis.
 
 Notes:
-- Ensure that `curl` is installed and available in the system's PATH.
-- The bar chart includes gridlines for better visualization.
+- Uses `pycurl` when installed; a single handle is reused so the connection
+  stays alive between requests.
+- Without `pycurl`, ensure that `curl` is installed and available in the
+  system's PATH. Requests are then sent in batches of URLs per curl process.
+- The "Python (http.client)" client measures in process with
+  `time.perf_counter_ns()`, without any subprocess on the critical path.
+- The matplotlib chart includes gridlines for better visualization; matplotlib
+  is only imported when that chart is requested.
 - All metrics are displayed in milliseconds (ms) for uniformity.
 
 Author: Mohan Chinnappan
@@ -1,98 +1,547 @@
 import streamlit as st
+import functools
+import http.client
+import shutil
+import io
+import socket
 import subprocess
 import time
-import pandas as pd
-import matplotlib.pyplot as plt
+import urllib.parse
 import numpy as np
 
+try:
+    import pycurl
+except ImportError:  # fall back to batched runs of the curl command line
+    pycurl = None
+
 
 # NetworkLatencyTester 
 # author: Mohan Chinnappan
 # -------------------------
 
+# Format written by the curl command line after each transfer: one line of
+# seconds, in the same order as NetworkLatencyTester.cols, then the number of
+# new connections the transfer opened and the HTTP status (0 if it failed)
+CURL_FORMAT = (
+    "%{time_namelookup} %{time_connect} %{time_appconnect} %{time_starttransfer} %{time_total}"
+    " %{num_connects} %{response_code}\n"
+)
+CURL_BATCH_SIZE = 20  # URLs per curl process, keeps the progress bar moving
+
+
+@functools.lru_cache(maxsize=None)
+def _curl_supports_rate():
+    """Whether the installed curl has the `--rate` option (curl 7.84+)."""
+    result = subprocess.run(["curl", "--version"], capture_output=True, text=True)
+    version = result.stdout.split()[1]  # "curl 7.88.1 (x86_64-pc-linux-gnu) ..."
+    major, minor = (int(part) for part in version.split(".")[:2])
+    return (major, minor) >= (7, 84)
+
+# Metrics collected for every request, all in milliseconds
+COLS = [
+    "DNS Lookup Time (ms)",
+    "TCP Connect Time (ms)",
+    "SSL Handshake Time (ms)",
+    "Server Processing Time (ms)",
+    "Total Time (ms)",
+]
+
+
+# Timed HTTP connections
+# -------------------------
+
+class TimedHTTPResponse(http.client.HTTPResponse):
+    """HTTPResponse noting when its status line has been read."""
+
+    status_read_ns = None
+
+    def _read_status(self):
+        status = super()._read_status()
+        if self.status_read_ns is None:  # skip any later interim (1xx) status
+            self.status_read_ns = time.perf_counter_ns()
+        return status
+
+
+class TimedHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection recording curl-style timings with perf_counter_ns().
+
+    Like curl's `time_*` variables, every timing is in nanoseconds since the
+    start of the request. The resolved address is cached on the connection.
+    """
+
+    TIMING_NAMES = ("time_namelookup", "time_connect", "time_appconnect", "time_starttransfer", "time_total")
+    response_class = TimedHTTPResponse
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.address = None
+        self.start()
+
+    def start(self):
+        """Reset the timings and start the clock for a new request."""
+        self.timings = dict.fromkeys(self.TIMING_NAMES, 0)
+        self._t0 = time.perf_counter_ns()
+
+    def _mark(self, name):
+        self.timings[name] = time.perf_counter_ns() - self._t0
+
+    def connect(self):
+        if self.address is None:
+            self.address = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)[0]
+        self._mark("time_namelookup")
+
+        family, type_, proto, _, sockaddr = self.address
+        self.sock = socket.socket(family, type_, proto)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(sockaddr)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._mark("time_connect")
+
+    def getresponse(self):
+        # The first byte has arrived once the status line is read; bytes seen
+        # before that may be TLS records such as session tickets
+        response = super().getresponse()
+        self.timings["time_starttransfer"] = response.status_read_ns - self._t0
+        return response
+
+    def finish(self, response):
+        """Read the response body and stop the clock."""
+        response.read()
+        self._mark("time_total")
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, http.client.HTTPSConnection):
+    """TimedHTTPConnection that also records the TLS handshake."""
+
+    def connect(self):
+        super().connect()
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host)
+        self._mark("time_appconnect")
+
+
 class NetworkLatencyTester:
-    def __init__(self, url, num_requests, delay):
+    def __init__(self, url, num_requests, delay, concurrency=1, keep_alive=True, backend=None,
+                 handle=None, dns_cache=None):
+        # Like curl, treat a URL without a scheme as plain HTTP
+        if "://" not in url:
+            url = "http://" + url
         self.url = url
+        # Parse the URL once; a malformed host or port raises ValueError here
+        self._parts = urllib.parse.urlparse(url)
+        self._port = self._parts.port
+        if not self._parts.hostname:
+            raise ValueError("no host name")
+        self.backend = backend or ("pycurl" if pycurl else "curl")
         self.num_requests = num_requests
         self.delay = delay
-        self.metrics = {
-            "DNS Lookup Time (ms)": [],
-            "TCP Connect Time (ms)": [],
-            "SSL Handshake Time (ms)": [],
-            "Server Processing Time (ms)": [],
-            "Total Time (ms)": [],
-        }
+        self.keep_alive = keep_alive
+        self.concurrency = max(1, min(concurrency, num_requests))
+        self.cols = COLS
+        # One row per request, one column per metric
+        self.data = np.empty((num_requests, len(self.cols)), dtype=np.float64)
+        # True where the request had to open a new connection (cold)
+        self.cold = np.zeros(num_requests, dtype=bool)
+        # Messages of the failed requests, whose rows hold NaN
+        self.errors = []
+        self._progress_step = max(1, num_requests // 100)
+
+        # One reusable libcurl handle: the TCP/TLS connection and the DNS
+        # answer are kept across requests unless keep-alive is turned off.
+        # Passing a handle from an earlier test carries its connection, DNS
+        # and TLS session caches over to this one.
+        self._c = None
+        if self.backend == "pycurl":
+            self._c = self._configure(handle or pycurl.Curl())
+        # (host, port) -> getaddrinfo() entry, for the http.client and curl clients
+        self.dns_cache = {} if dns_cache is None else dns_cache
+        # Time of the up-front host lookup made for the curl command, if any
+        self.dns_lookup_ms = None
+
+    def _configure(self, c):
+        """Configure a libcurl easy handle for the test URL."""
+        c.setopt(pycurl.URL, self.url)
+        c.setopt(pycurl.WRITEFUNCTION, lambda chunk: None)  # discard body, like -o /dev/null
+        c.setopt(pycurl.NOSIGNAL, 1)
+        if self.keep_alive:
+            c.setopt(pycurl.FORBID_REUSE, 0)
+            c.setopt(pycurl.FRESH_CONNECT, 0)
+            c.setopt(pycurl.DNS_CACHE_TIMEOUT, -1)
+            c.setopt(pycurl.SSL_SESSIONID_CACHE, 1)
+            c.setopt(pycurl.TCP_KEEPALIVE, 1)
+        else:
+            # Every request starts cold: new DNS lookup, TCP and TLS handshake
+            c.setopt(pycurl.FORBID_REUSE, 1)
+            c.setopt(pycurl.FRESH_CONNECT, 1)
+            c.setopt(pycurl.DNS_CACHE_TIMEOUT, 0)
+            c.setopt(pycurl.SSL_SESSIONID_CACHE, 0)
+            c.setopt(pycurl.TCP_KEEPALIVE, 0)
+        return c
+
+    @staticmethod
+    def _timings(c):
+        """Read the timings of the last transfer on a handle, in milliseconds."""
+        return (
+            c.getinfo(pycurl.NAMELOOKUP_TIME) * 1000,
+            c.getinfo(pycurl.CONNECT_TIME) * 1000,
+            c.getinfo(pycurl.APPCONNECT_TIME) * 1000,
+            c.getinfo(pycurl.STARTTRANSFER_TIME) * 1000,
+            c.getinfo(pycurl.TOTAL_TIME) * 1000,
+        )
 
-    def perform_requests(self, progress_bar, status_text):
+    def perform_requests(self, progress_bar=None, status_text=None):
         """Perform the requests and collect metrics."""
+        if self.num_requests == 1:
+            self._single_shot()
+            return
+
+        if self.backend == "python":
+            self._perform_python(progress_bar, status_text)
+        elif self.backend == "curl":
+            self._perform_cli(progress_bar, status_text)
+        elif self.concurrency > 1:
+            self._perform_parallel(progress_bar, status_text)
+        else:
+            self._perform_sequential(progress_bar, status_text)
+
+        # Clear the progress bar and status text when done
+        progress_bar.empty()
+        status_text.text("Requests completed!")
+
+    def _single_shot(self):
+        """Perform a single request without progress reporting."""
+        if self.backend == "pycurl":
+            self._perform_one(self._c, 0)
+        elif self.backend == "python":
+            self._perform_python()
+        else:
+            self._perform_cli()
+
+    def _fail(self, i, message):
+        """Record request `i` as failed."""
+        self.data[i] = np.nan
+        self.cold[i] = False
+        self.errors.append(message)
+
+    def _perform_one(self, c, i):
+        """Run request `i` on a libcurl handle and record its metrics."""
+        try:
+            c.perform()
+        except pycurl.error as e:
+            self._fail(i, e.args[1])
+            return
+        self.data[i] = self._timings(c)
+        self.cold[i] = c.getinfo(pycurl.NUM_CONNECTS) > 0
+
+    def _due_for_update(self, i):
+        """Whether request `i` should refresh the progress bar and status.
+
+        Every widget update is a message to the browser, so long tests send
+        about a hundred of them at most, always including the first and last.
+        """
+        return i % self._progress_step == 0 or i == self.num_requests - 1
+
+    def _wait_for_slot(self, t0, i):
+        """Sleep until request `i` is due, `i * delay` seconds after `t0`.
+
+        Scheduling against a fixed start keeps the request rate at one per
+        `delay`, whatever time the requests themselves take.
+        """
+        remaining = t0 + i * self.delay - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _perform_sequential(self, progress_bar, status_text):
+        """Perform the requests one at a time, starting one every `delay` seconds."""
+        c = self._c
+        t0 = time.perf_counter()
         for i in range(self.num_requests):
             # Update the progress bar and status
-            progress_bar.progress((i + 1) / self.num_requests)
-            status_text.text(f"Performing request #{i + 1}...")
-
-            # Run the curl command
-            result = subprocess.run(
-                [
-                    "curl",
-                    "-o", "/dev/null",
-                    "-s",
-                    "-w",
-                    "DNS Lookup Time: %{time_namelookup}\n"
-                    "TCP Connect Time: %{time_connect}\n"
-                    "SSL Handshake Time: %{time_appconnect}\n"
-                    "Server Processing Time: %{time_starttransfer}\n"
-                    "Total Time: %{time_total}\n",
-                    self.url,
-                ],
-                capture_output=True,
-                text=True,
-            )
+            if self._due_for_update(i):
+                progress_bar.progress((i + 1) / self.num_requests)
+                status_text.text(f"Performing request #{i + 1}...")
 
-            # Parse the metrics and convert to milliseconds
-            for line in result.stdout.splitlines():
-                metric, value = line.split(": ")
-                metric_ms = metric + " (ms)"  # Update metric name for milliseconds
-                self.metrics[metric_ms].append(float(value) * 1000)  # Convert to ms
+            # Run the request on the shared handle
+            self._perform_one(c, i)
 
-            # Wait for the specified delay before the next request
+            # Wait until the next request is due
             if i < self.num_requests - 1:
-                time.sleep(self.delay)
+                self._wait_for_slot(t0, i + 1)
 
-        # Clear the progress bar and status text when done
-        progress_bar.empty()
-        status_text.text("Requests completed!")
+    def _perform_parallel(self, progress_bar, status_text):
+        """Perform the requests with up to `concurrency` of them in flight.
+
+        A finished handle is immediately reused for the next request, so
+        `delay` does not apply here.
+        """
+        multi = pycurl.CurlMulti()
+        free = [self._c] + [self._configure(pycurl.Curl()) for _ in range(self.concurrency - 1)]
+        in_flight = {}  # handle -> request index
+        next_request = 0
+        done = 0
 
-    def to_dataframe(self):
-        """Convert metrics to a Pandas DataFrame."""
-        data = {metric: self.metrics[metric] for metric in self.metrics}
-        data["Request Number"] = [i + 1 for i in range(len(self.metrics["DNS Lookup Time (ms)"]))]
-        return pd.DataFrame(data)
+        while done < self.num_requests:
+            # Fill the free slots with the next requests
+            while free and next_request < self.num_requests:
+                c = free.pop()
+                in_flight[c] = next_request
+                multi.add_handle(c)
+                next_request += 1
+
+            while True:
+                ret, _ = multi.perform()
+                if ret != pycurl.E_CALL_MULTI_PERFORM:
+                    break
+
+            # Collect the finished transfers and free their handles
+            while True:
+                queued, ok_list, err_list = multi.info_read()
+                for c, errno, errmsg in err_list:
+                    self._fail(in_flight[c], errmsg)
+                for c in ok_list:
+                    i = in_flight[c]
+                    self.data[i] = self._timings(c)
+                    self.cold[i] = c.getinfo(pycurl.NUM_CONNECTS) > 0
+                for c in ok_list + [c for c, _, _ in err_list]:
+                    del in_flight[c]
+                    multi.remove_handle(c)
+                    free.append(c)
+                    done += 1
+                    if self._due_for_update(done - 1):
+                        progress_bar.progress(done / self.num_requests)
+                        status_text.text(f"Completed request {done} of {self.num_requests}...")
+                if queued == 0:
+                    break
+
+            if done < self.num_requests:
+                multi.select(1.0)
+
+    def _perform_cli(self, progress_bar=None, status_text=None):
+        """Perform the requests with the curl command line, in batches.
+
+        curl reuses its connection between the URLs of one invocation, so each
+        batch costs a single process spawn and TCP/TLS handshake. `delay` is
+        honored with `--rate` inside a batch and by scheduling the batches;
+        a curl without `--rate` runs one request per batch.
+        """
+        if shutil.which("curl") is None:
+            for i in range(self.num_requests):
+                self._fail(i, "Cannot run curl: not found on the PATH")
+            return
+        batch_size = CURL_BATCH_SIZE if self.concurrency > 1 or _curl_supports_rate() else 1
+        rate = f"{max(1, round(3600 / self.delay))}/h"
+        # With keep-alive, every batch connects to the address resolved once
+        # here, so the per-request readings no longer include DNS
+        resolve = []
+        host = self._parts.hostname
+        if self.keep_alive and host:
+            try:
+                resolve = ["--resolve", self._curl_resolve_arg()]
+            except socket.gaierror as e:
+                for i in range(self.num_requests):
+                    self._fail(i, f"Could not resolve host {host}: {e.strerror}")
+                return
+        t0 = time.perf_counter()
+        for start in range(0, self.num_requests, batch_size):
+            count = min(batch_size, self.num_requests - start)
+
+            # Update the progress bar and status
+            if progress_bar is not None:
+                progress_bar.progress((start + count) / self.num_requests)
+                status_text.text(f"Performing requests #{start + 1}-#{start + count}...")
+
+            # Run one curl command for the whole batch
+            args = ["curl", "-sS", "-w", CURL_FORMAT] + resolve
+            if self.concurrency > 1:
+                args += ["--parallel", "--parallel-max", str(self.concurrency)]
+            elif count > 1:
+                args += ["--rate", rate]
+            if not self.keep_alive:
+                args += ["-H", "Connection: close"]
+            for _ in range(count):
+                args += ["-o", "/dev/null", self.url]
+            result = subprocess.run(args, capture_output=True, text=True)
+
+            # Parse the metrics (one line per transfer) and convert to milliseconds
+            values = np.array(result.stdout.split(), dtype=np.float64)
+            errors = result.stderr.splitlines() or [f"curl exited with code {result.returncode}"]
+            if values.size != count * (len(self.cols) + 2):
+                # curl did not run the transfers at all (bad option, bad URL...)
+                for i in range(start, start + count):
+                    self._fail(i, " ".join(errors))
+            else:
+                values = values.reshape(count, len(self.cols) + 2)
+                self.data[start:start + count] = values[:, :len(self.cols)] * 1000
+                self.cold[start:start + count] = values[:, -2] > 0
+                for k, i in enumerate(np.flatnonzero(values[:, -1] == 0)):
+                    self._fail(start + i, errors[min(k, len(errors) - 1)])
+
+            # Wait until the first request of the next batch is due
+            if start + count < self.num_requests and self.concurrency == 1:
+                self._wait_for_slot(t0, start + count)
+
+    def _curl_resolve_arg(self):
+        """Resolve the URL's host and return it as a curl `--resolve` value.
+
+        The lookup is timed into `dns_lookup_ms`, unless the address is
+        already in `dns_cache`.
+        """
+        parts = self._parts
+        port = self._port or (443 if parts.scheme == "https" else 80)
+        key = (parts.hostname, port)
+        address = self.dns_cache.get(key)
+        if address is None:
+            start = time.perf_counter_ns()
+            address = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)[0]
+            self.dns_lookup_ms = (time.perf_counter_ns() - start) / 1e6
+            self.dns_cache[key] = address
+
+        ip = address[4][0]
+        if address[0] == socket.AF_INET6:
+            ip = f"[{ip}]"
+        return f"{parts.hostname}:{port}:{ip}"
+
+    def _perform_python(self, progress_bar=None, status_text=None):
+        """Perform the requests in process with http.client, one at a time.
+
+        No subprocess or library sits between the clock and the socket, which
+        keeps sub-millisecond LAN readings clean.
+        """
+        parts = self._parts
+        conn_class = TimedHTTPSConnection if parts.scheme == "https" else TimedHTTPConnection
+        conn = conn_class(parts.hostname, self._port, timeout=30)
+        address_key = (conn.host, conn.port)
+        if self.keep_alive:
+            conn.address = self.dns_cache.get(address_key)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {} if self.keep_alive else {"Connection": "close"}
+
+        t0 = time.perf_counter()
+        for i in range(self.num_requests):
+            # Update the progress bar and status
+            if progress_bar is not None and self._due_for_update(i):
+                progress_bar.progress((i + 1) / self.num_requests)
+                status_text.text(f"Performing request #{i + 1}...")
+
+            # Run the request on the shared connection
+            reused = conn.sock is not None
+            try:
+                try:
+                    response = self._python_request(conn, path, headers)
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    if not reused:
+                        raise
+                    # The server closed the idle connection: retry once on a new one
+                    conn.close()
+                    reused = False
+                    response = self._python_request(conn, path, headers)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                self._fail(i, str(e) or type(e).__name__)
+            else:
+                if not self.keep_alive or response.will_close:
+                    conn.close()
+                # Convert the nanosecond timings to milliseconds
+                self.data[i] = np.fromiter(conn.timings.values(), dtype=np.int64, count=len(self.cols)) / 1e6
+                self.cold[i] = not reused
+
+            if self.keep_alive:
+                self.dns_cache[address_key] = conn.address
+            else:
+                conn.address = None  # resolve again for the next request
+
+            # Wait until the next request is due
+            if i < self.num_requests - 1:
+                self._wait_for_slot(t0, i + 1)
+
+        conn.close()
+
+    @staticmethod
+    def _python_request(conn, path, headers):
+        """Send one GET on a timed connection and read the whole response."""
+        conn.start()
+        conn.request("GET", path, headers=headers)
+        response = conn.getresponse()
+        conn.finish(response)
+        return response
+
+    def summary(self):
+        """Summarize each metric: percentiles, mean and standard deviation."""
+        ok = self.data[~np.isnan(self.data[:, 0])]  # failed requests are left out
+        if len(ok) == 0:
+            return {}
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99], axis=0)
+        return {
+            "p50": dict(zip(self.cols, p50)),
+            "p95": dict(zip(self.cols, p95)),
+            "p99": dict(zip(self.cols, p99)),
+            "mean": dict(zip(self.cols, ok.mean(axis=0))),
+            "std": dict(zip(self.cols, ok.std(axis=0))),
+        }
+
+    def to_table(self):
+        """Convert metrics to a dict of columns, ready for st.dataframe."""
+        return _build_table(self.data.tobytes(), self.cold.tobytes(), self.num_requests)
+
+    def to_csv(self):
+        """Serialize the metrics table as CSV text."""
+        table = self.to_table()
+        buf = io.StringIO()
+        np.savetxt(
+            buf,
+            np.rec.fromarrays(list(table.values())),
+            fmt=["%.3f"] * len(self.cols) + ["%d", "%s"],
+            delimiter=",",
+            header=",".join(table),
+            comments="",
+        )
+        return buf.getvalue()
 
     def plot_metrics(self):
-        """Plot the metrics as a bar chart."""
-        num_metrics = len(self.metrics)
-        x = np.arange(len(self.metrics["DNS Lookup Time (ms)"]))  # Number of requests
-        width = 0.15  # Bar width
+        """Plot the metrics as a matplotlib bar chart."""
+        return _build_fig(self.data.tobytes(), self.num_requests)
+
+
+# Rendering helpers, cached on the raw metrics so that Streamlit reruns
+# (any widget interaction) do not rebuild the table and the figure
+# -------------------------
+
+@st.cache_data
+def _build_table(data_bytes, cold_bytes, n):
+    data = np.frombuffer(data_bytes).reshape(n, len(COLS))
+    cold = np.frombuffer(cold_bytes, dtype=bool)
+    return {
+        **{col: data[:, i] for i, col in enumerate(COLS)},
+        "Request Number": np.arange(1, n + 1),
+        "Connection": np.select([np.isnan(data[:, 0]), cold], ["failed", "cold"], "warm"),
+    }
+
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+@st.cache_data
+def _build_fig(data_bytes, n):
+    # Only needed for the PNG chart, keeps them off the cold start
+    import matplotlib.pyplot as plt
+    import pandas as pd
 
-        # Plot each metric as a separate bar
-        for i, (metric, values) in enumerate(self.metrics.items()):
-            ax.bar(x + i * width, values, width, label=metric)
+    data = np.frombuffer(data_bytes).reshape(n, len(COLS))
+    fig, ax = plt.subplots(figsize=(12, 6))
 
-        # Add labels, legend, and title
-        ax.set_xlabel("Request Number")
-        ax.set_ylabel("Time (ms)")
-        ax.set_title("Request Timing Metrics (in ms)")
-        ax.set_xticks(x + (num_metrics - 1) * width / 2)
-        ax.set_xticklabels([f"#{i + 1}" for i in range(len(self.metrics["DNS Lookup Time (ms)"]))])
-        ax.legend()
+    # Plot all metrics as grouped bars in one call
+    index = pd.RangeIndex(1, n + 1, name="Request Number")
+    pd.DataFrame(data, columns=COLS, index=index).plot.bar(ax=ax, width=0.8, rot=0)
 
-        # Add grid for better readability
-        ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+    # Add labels, legend, and title
+    ax.set_xlabel("Request Number")
+    ax.set_ylabel("Time (ms)")
+    ax.set_title("Request Timing Metrics (in ms)")
+    ax.legend()
 
-        plt.tight_layout()
-        return fig
+    # Add grid for better readability
+    ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+
+    plt.tight_layout()
+    return fig
 
 
 # Streamlit App
@@ -106,33 +555,104 @@ def main():
     url = st.sidebar.text_input("URL to Test", value="https://google.com")
     num_requests = st.sidebar.number_input("Number of Requests", min_value=1, value=5, step=1)
     delay = st.sidebar.number_input("Delay Between Requests (seconds)", min_value=0.1, value=1.0, step=0.1)
+    concurrency = st.sidebar.number_input(
+        "Parallel Requests", min_value=1, value=1, step=1,
+        help="Requests kept in flight at once. With more than 1, the delay is not applied.",
+    )
+    backends = {"curl command": "curl", "Python (http.client)": "python"}
+    if pycurl:
+        backends = {"libcurl (pycurl)": "pycurl", **backends}
+    backend = st.sidebar.selectbox(
+        "HTTP Client", list(backends),
+        help="Python (http.client) runs in process and sends one request at a time.",
+    )
+    keep_alive = st.sidebar.checkbox(
+        "Reuse connection (keep-alive)", value=True,
+        help=(
+            "When on, the connection, DNS answer and TLS session are reused, also by later tests "
+            "in this session. When off, every request starts cold."
+        ),
+    )
+
+    # Kept across tests (reruns) so a new test can resume the previous connection
+    if pycurl and "curl_handle" not in st.session_state:
+        st.session_state.curl_handle = pycurl.Curl()
+    if "dns_cache" not in st.session_state:
+        st.session_state.dns_cache = {}
+
+    csv_file = "metrics.csv"
 
     # Start test button
     if st.sidebar.button("Start Test"):
-        tester = NetworkLatencyTester(url, num_requests, delay)
+        try:
+            tester = NetworkLatencyTester(
+                url, num_requests, delay, concurrency, keep_alive, backends[backend],
+                handle=st.session_state.get("curl_handle"), dns_cache=st.session_state.dns_cache,
+            )
+        except ValueError as e:
+            st.error(f"Not a valid URL {url!r}: {e}")
+            st.stop()
 
-        # Add progress bar and status text
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        if num_requests == 1:
+            # Quick check: no progress reporting needed
+            tester.perform_requests()
+        else:
+            # Add progress bar and status text
+            progress_bar = st.progress(0)
+            status_text = st.empty()
 
-        # Perform requests
-        tester.perform_requests(progress_bar, status_text)
+            # Perform requests
+            tester.perform_requests(progress_bar, status_text)
 
-        # Display metrics as a DataFrame
-        df = tester.to_dataframe()
-        st.subheader("Request Metrics (in ms)")
-        st.dataframe(df)
+        if tester.errors:
+            unique = "; ".join(dict.fromkeys(tester.errors))
+            st.error(f"{len(tester.errors)} of {num_requests} requests failed: {unique}")
+
+        if tester.dns_lookup_ms is not None:
+            st.info(f"Host resolved once up front in {tester.dns_lookup_ms:.2f} ms (cold DNS lookup).")
 
-        # Save CSV file
-        csv_file = "metrics.csv"
-        df.to_csv(csv_file, index=False)
+        # Save CSV file, serialized once for both the file and the download
+        csv_text = tester.to_csv()
+        with open(csv_file, "w") as f:
+            f.write(csv_text)
         st.success(f"Metrics saved to {csv_file}")
-        st.download_button("Download CSV", df.to_csv(index=False), file_name=csv_file, mime="text/csv")
 
-        # Plot the metrics
+        # Keep the results for later reruns
+        st.session_state.tester = tester
+        st.session_state.csv_text = csv_text
+
+    if "tester" in st.session_state and st.session_state.tester.num_requests == 1:
+        tester = st.session_state.tester
+
+        # A single request reads best as five numbers
+        st.subheader("Request Metrics (in ms)")
+        for column, metric, value in zip(st.columns(len(tester.cols)), tester.cols, tester.data[0]):
+            column.metric(metric.replace(" (ms)", ""), "n/a" if np.isnan(value) else f"{value:.2f} ms")
+        st.download_button("Download CSV", st.session_state.csv_text, file_name=csv_file, mime="text/csv")
+
+    elif "tester" in st.session_state:
+        tester = st.session_state.tester
+
+        # Display the summary, then every request
+        summary = tester.summary()
+        if summary:
+            st.subheader("Summary (in ms)")
+            st.table(summary)
+        st.subheader("Request Metrics (in ms)")
+        st.dataframe(tester.to_table())
+        st.download_button("Download CSV", st.session_state.csv_text, file_name=csv_file, mime="text/csv")
+
+        # Plot the metrics, rendered client side
         st.subheader("Metrics Chart (in ms)")
-        fig = tester.plot_metrics()
-        st.pyplot(fig)
+        st.bar_chart(tester.to_table(), x="Request Number", y=tester.cols, stack=False)
+
+        # Static chart for download
+        if st.checkbox("Matplotlib chart (PNG)"):
+            fig = tester.plot_metrics()
+            st.pyplot(fig)
+            png = io.BytesIO()
+            fig.savefig(png, format="png")
+            st.download_button("Download PNG", png.getvalue(), file_name="metrics.png", mime="image/png")
 
 
 if __name__ == "__main__":